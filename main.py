@@ -11,23 +11,27 @@
 from __future__ import annotations
 import os
 import re
+import atexit
+import hmac
 import json
 import time
+import queue
+import functools
 import threading
-import hashlib
-from collections import deque
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, NamedTuple, Optional, Set
 
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo  # Python 3.9+
+import pandas as pd
 import streamlit as st
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter, Retry
 
 # Solapi SDK가 설치되어 있으면 사용(권장). 없으면 None.
 try:
@@ -36,6 +40,34 @@ try:
 except Exception:
     HAS_SOLAPI_SDK = False
 
+# orjson이 설치되어 있으면 스냅샷 직렬화에 사용(수 배 빠름). 없으면 stdlib json.
+try:
+    import orjson  # pip install orjson
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+
+# xxhash가 설치되어 있으면 라인 중복차단 해시에 사용. 없으면 내장 hash.
+try:
+    import xxhash  # pip install xxhash
+    HAS_XXHASH = True
+except Exception:
+    HAS_XXHASH = False
+
+# watchdog이 설치되어 있으면 tail 스레드를 커널 이벤트로 깨움(유휴 시 syscall 0회).
+# 없으면 200ms 폴링만으로 동작.
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except Exception:
+    HAS_WATCHDOG = False
+
+
+# 핫패스에서 쓰는 정규식은 모듈 로드 시 1회만 컴파일
+_RE_NONDIGIT = re.compile(r"\D")
+_RE_DRIVE = re.compile(r"[A-Za-z]:")
+
 
 # =========================
 # 환경 변수 로드 / 상수
@@ -46,7 +78,7 @@ APP_PASSWORD = os.getenv("APP_PASSWORD", "").strip()
 
 # LOG_DIR 보정: 'C:'처럼 드라이브 문자만 들어오면 보정
 _raw_log_dir = os.getenv("LOG_DIR", "./logs").strip().strip('"').strip("'")
-if re.fullmatch(r"[A-Za-z]:", _raw_log_dir):  # e.g., 'C:'
+if _RE_DRIVE.fullmatch(_raw_log_dir):  # e.g., 'C:'
     _raw_log_dir = _raw_log_dir + "/logs"
 if not _raw_log_dir:
     _raw_log_dir = "./logs"
@@ -74,33 +106,71 @@ VEHICLES: List[str] = [
     "금암물탱크",
     "굴절", "사다리", "구조", "대응단",
 ]
-VEHICLE_SET: Set[str] = set(VEHICLES)
-
 # 약칭/공백 보정(필요시 확장)
 ALIASES: Dict[str, str] = {
     "금암구급02": "금암구급2",
     "금암구급2호": "금암구급2",
 }
 
+# 정식명+별칭 → 정식명 통합 매핑: 멤버십 검사와 별칭 보정을 dict 조회 1회로
+_RESOLVE: Dict[str, str] = {v: v for v in VEHICLES}
+_RESOLVE.update(ALIASES)
+
+# 하단 고정 안내문(정적 텍스트 — 매 rerun마다 새로 만들 필요 없음)
+FOOTER_TEXT = """
+실행:
+1) .env 설정(LOG_DIR, LOG_FILE_PREFIX, APP_TZ, SOLAPI_*)
+2) pip install streamlit pandas apscheduler python-dotenv requests tzdata [solapi orjson xxhash watchdog]
+3) streamlit run app.py
+- 파일명: {LOG_DIR}/{LOG_FILE_PREFIX}{YYYY.MM.DD}.txt
+- 매일 09:00(타임존 기준) 리셋, 자정 파일 롤오버
+- Solapi 미설정/미설치면 개발모드로 콘솔로그만 출력됩니다.
+"""
+
 # =========================
 # 유틸 (TZ-aware)
 # =========================
 def now_tz() -> datetime:
     return datetime.now(TZ)
 
+# 같은 초 안에서는 datetime 생성/strftime을 반복하지 않도록 초 단위 캐시
+_ts_cache: Dict[str, Any] = {"sec": -1, "dots": "", "compact": "", "iso": "", "hms": ""}
+
+def _refresh_ts():
+    sec = int(time.time())
+    if sec == _ts_cache["sec"]:
+        return
+    n = now_tz()
+    _ts_cache.update(
+        sec=sec,
+        dots=n.strftime("%Y.%m.%d"),
+        compact=n.strftime("%Y%m%d"),
+        iso=n.isoformat(timespec="seconds"),
+        hms=n.strftime("%H:%M:%S"),
+    )
+
 def today_str_dots() -> str:
     # 파일명용 YYYY.MM.DD
-    return now_tz().strftime("%Y.%m.%d")
+    _refresh_ts()
+    return _ts_cache["dots"]
 
 def today_str_compact() -> str:
     # JSON 파일명 등 YYYYMMDD
-    return now_tz().strftime("%Y%m%d")
+    _refresh_ts()
+    return _ts_cache["compact"]
 
 def now_iso() -> str:
-    return now_tz().isoformat(timespec="seconds")
+    _refresh_ts()
+    return _ts_cache["iso"]
 
+def now_hms() -> str:
+    _refresh_ts()
+    return _ts_cache["hms"]
+
+@functools.lru_cache(maxsize=4096)
 def mask_phone(phone: str) -> str:
-    p = re.sub(r"\D", "", phone or "")
+    # 같은 번호는 세션 내 반복 호출되므로 캐시 히트 = dict 조회 1회
+    p = _RE_NONDIGIT.sub("", phone or "")
     if len(p) == 11:
         return f"{p[:3]}-{p[3:7]}-{p[7:]}"
     if len(p) == 10:
@@ -108,21 +178,32 @@ def mask_phone(phone: str) -> str:
     return phone or ""
 
 def valid_phone(phone: str) -> bool:
-    p = re.sub(r"\D", "", phone or "")
-    return p.isdigit() and len(p) in (10, 11)
+    # 숫자만 입력이 전제(UI 플레이스홀더 참조) — isdigit은 C 레벨 루프라 충분히 싸다
+    p = phone or ""
+    return len(p) in (10, 11) and p.isdigit()
+
+_BRACKET_STRIP = b" \t\r"
 
-def last_bracket_value(line: str) -> Optional[str]:
-    matches = re.findall(r"\[([^\[\]]+)\]", line)
-    if not matches:
+def last_bracket_value(line: bytes) -> Optional[str]:
+    # 마지막 [...]만 필요하므로 정규식 대신 rfind 역방향 스캔.
+    # bytes 상태로 찾고, 후보 조각만 디코드해 유니코드 경계를 최소화.
+    i = line.rfind(b"]")
+    if i < 0:
+        return None
+    j = line.rfind(b"[", 0, i)
+    if j < 0:
         return None
-    cand = matches[-1].strip()
-    cand_nospace = cand.replace(" ", "")
-    # 별칭 매핑
-    cand_nospace = ALIASES.get(cand_nospace, cand_nospace)
-    return cand_nospace
+    cand = line[j + 1:i].translate(None, _BRACKET_STRIP)
+    if not cand:
+        return None
+    # 원시 후보만 반환. 별칭/허용목록 판정은 _RESOLVE에서 1회로 처리.
+    return cand.decode("utf-8", errors="ignore")
 
-def line_hash(line: str) -> str:
-    return hashlib.sha1(line.encode("utf-8", errors="ignore")).hexdigest()
+def line_hash(line: bytes) -> int:
+    # 중복차단용 비암호화 해시. 64비트 int 하나로 충분.
+    if HAS_XXHASH:
+        return xxhash.xxh3_64_intdigest(line)
+    return hash(line)
 
 def current_log_path() -> str:
     # {LOG_DIR}/{LOG_PREFIX}{YYYY.MM.DD}.txt
@@ -132,29 +213,123 @@ def current_log_path() -> str:
 # =========================
 # 저장소 (당일 JSON)
 # =========================
+class Rec(NamedTuple):
+    # 조회용 경량 레코드: dict 키 탐색 대신 C 레벨 오프셋 접근
+    phone: str
+    vehicles: tuple
+    cancel_hold_until_09: bool
+    created_at: str
+    created_at_short: str
+
+
 class Storage:
     def __init__(self):
         self.lock = threading.Lock()
         self.today = today_str_compact()
         self.json_path = os.path.join(DATA_DIR, f"subscribers_{self.today}.json")
+        self.journal_path = os.path.join(DATA_DIR, f"subscribers_{self.today}.jsonl")
         self.state: Dict[str, Dict[str, Any]] = {}
+        # 차량→구독 전화번호 역색인 + 보류 전화번호 집합 (핫패스 O(1) 조회용)
+        self._by_vehicle: Dict[str, Set[str]] = {v: set() for v in VEHICLES}
+        self._held: Set[str] = set()
+        # 변경 시마다 증가. UI 캐시 무효화 키로 사용.
+        self._version = 0
+        self._journal_fh = None  # 저널 append 핸들(지연 오픈, 로테이션 시 교체)
         self._load_today()
 
     def _load_today(self):
         with self.lock:
+            # 스냅샷(있으면) → 저널 순서로 재생하여 상태 복원
             if os.path.exists(self.json_path):
                 try:
-                    with open(self.json_path, "r", encoding="utf-8") as f:
-                        self.state = json.load(f)
+                    with open(self.json_path, "rb") as f:
+                        data = f.read()
+                    self.state = orjson.loads(data) if HAS_ORJSON else json.loads(data)
                 except Exception:
                     self.state = {}
             else:
                 self.state = {}
-                self._persist()
+            self._replay_journal()
+            self._rebuild_index()
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            loads = orjson.loads if HAS_ORJSON else json.loads
+            with open(self.journal_path, "rb") as f:
+                for raw in f:
+                    raw = raw.strip()
+                    if not raw:
+                        continue
+                    try:
+                        op = loads(raw)
+                    except Exception:
+                        continue  # 쓰다 만 마지막 줄 등은 무시
+                    self._apply_op(op)
+        except Exception:
+            pass
+
+    def _apply_op(self, op: Dict[str, Any]):
+        kind = op.get("op")
+        phone = op.get("phone")
+        if not phone:
+            return
+        if kind == "upsert":
+            self.state[phone] = op.get("rec", {})
+        elif kind == "remove":
+            self.state.pop(phone, None)
+        elif kind == "hold":
+            if phone in self.state:
+                self.state[phone]["cancel_hold_until_09"] = op.get("hold", False)
+
+    def _rebuild_index(self):
+        self._by_vehicle = {v: set() for v in VEHICLES}
+        self._held = set()
+        for phone, rec in self.state.items():
+            for v in rec.get("vehicles", []):
+                if v in self._by_vehicle:
+                    self._by_vehicle[v].add(phone)
+            if rec.get("cancel_hold_until_09", False):
+                self._held.add(phone)
+
+    def _index_remove(self, phone: str):
+        for subs in self._by_vehicle.values():
+            subs.discard(phone)
+        self._held.discard(phone)
+
+    def _close_journal(self):
+        if self._journal_fh:
+            try:
+                self._journal_fh.close()
+            except Exception:
+                pass
+            self._journal_fh = None
+
+    def _append_journal(self, op: Dict[str, Any]):
+        # 변경 1건 = 한 줄 append. 전체 rewrite 없음. 핸들은 열어두고 재사용.
+        if HAS_ORJSON:
+            line = orjson.dumps(op) + b"\n"
+        else:
+            line = json.dumps(op, ensure_ascii=False).encode("utf-8") + b"\n"
+        if self._journal_fh is None:
+            self._journal_fh = open(self.journal_path, "ab")
+        self._journal_fh.write(line)
+        self._journal_fh.flush()
 
     def _persist(self):
-        with open(self.json_path, "w", encoding="utf-8") as f:
-            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        # 전체 스냅샷 기록(롤오버/리셋 시에만 호출)
+        # tmp에 쓰고 fsync 후 rename — 중간에 죽어도 깨진 스냅샷이 남지 않음
+        if HAS_ORJSON:
+            data = orjson.dumps(self.state)
+        else:
+            data = json.dumps(self.state, ensure_ascii=False).encode("utf-8")
+        tmp = self.json_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.json_path)
 
     def ensure_today(self):
         t = today_str_compact()
@@ -163,15 +338,26 @@ class Storage:
 
     def rotate_to(self, new_day: str):
         with self.lock:
+            # 저널을 스냅샷으로 압축한 뒤 아카이브
+            self._close_journal()
+            self._persist()
             if os.path.exists(self.json_path):
                 archive_to = os.path.join(ARCHIVE_DIR, os.path.basename(self.json_path))
                 try:
                     os.replace(self.json_path, archive_to)
                 except Exception:
                     pass
+            try:
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+            except Exception:
+                pass
             self.today = new_day
             self.json_path = os.path.join(DATA_DIR, f"subscribers_{self.today}.json")
+            self.journal_path = os.path.join(DATA_DIR, f"subscribers_{self.today}.jsonl")
             self.state = {}
+            self._rebuild_index()
+            self._version += 1
             self._persist()
 
     def reset_0900(self):
@@ -179,38 +365,64 @@ class Storage:
 
     def upsert(self, phone: str, vehicles: List[str], cancel_hold: bool = False):
         with self.lock:
-            self.state[phone] = {
+            iso = now_iso()
+            rec = {
                 "phone": phone,
                 "vehicles": vehicles,
                 "cancel_hold_until_09": cancel_hold,
-                "created_at": now_iso(),
+                "created_at": iso,
+                # 표시용은 삽입 시점에 한 번만 잘라둔다(렌더마다 슬라이스 방지)
+                "created_at_short": iso[:19],
             }
-            self._persist()
+            self.state[phone] = rec
+            self._index_remove(phone)
+            for v in vehicles:
+                if v in self._by_vehicle:
+                    self._by_vehicle[v].add(phone)
+            if cancel_hold:
+                self._held.add(phone)
+            self._version += 1
+            self._append_journal({"op": "upsert", "phone": phone, "rec": rec})
 
     def remove(self, phone: str):
         with self.lock:
             if phone in self.state:
                 del self.state[phone]
-                self._persist()
+                self._index_remove(phone)
+                self._version += 1
+                self._append_journal({"op": "remove", "phone": phone})
 
     def set_cancel_hold(self, phone: str, hold: bool):
         with self.lock:
             if phone in self.state:
                 self.state[phone]["cancel_hold_until_09"] = hold
-                self._persist()
+                if hold:
+                    self._held.add(phone)
+                else:
+                    self._held.discard(phone)
+                self._version += 1
+                self._append_journal({"op": "hold", "phone": phone, "hold": hold})
 
-    def list(self) -> List[Dict[str, Any]]:
+    def version(self) -> int:
+        return self._version
+
+    def get(self, phone: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.state.get(phone)
+
+    def list(self) -> List[Rec]:
         with self.lock:
-            return list(self.state.values())
+            return [Rec(
+                rec.get("phone", ""),
+                tuple(rec.get("vehicles", ())),
+                rec.get("cancel_hold_until_09", False),
+                rec.get("created_at", ""),
+                rec.get("created_at_short") or rec.get("created_at", "")[:19],
+            ) for rec in self.state.values()]
 
     def subscribers_for_vehicle(self, vehicle: str) -> List[str]:
         with self.lock:
-            out = []
-            for rec in self.state.values():
-                if vehicle in rec.get("vehicles", []):
-                    if not rec.get("cancel_hold_until_09", False):
-                        out.append(rec["phone"])
-            return out
+            return list(self._by_vehicle.get(vehicle, set()) - self._held)
 
 
 # =========================
@@ -222,6 +434,13 @@ class SmsProvider:
         self.api_secret = SOLAPI_API_SECRET
         self.sender = SOLAPI_SENDER
         self.client = None
+        # REST 폴백용 커넥션 풀: TLS 핸드셰이크를 발송마다 반복하지 않도록 keep-alive
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=4, pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+        ))
+        atexit.register(self._session.close)
         if self.is_configured() and HAS_SOLAPI_SDK:
             try:
                 self.client = Solapi(api_key=self.api_key, api_secret=self.api_secret)
@@ -242,7 +461,7 @@ class SmsProvider:
 
         if HAS_SOLAPI_SDK and self.client:
             try:
-                msg = Message(to=re.sub(r"\D", "", phone), _from=self.sender, text=text)
+                msg = Message(to=_RE_NONDIGIT.sub("", phone), _from=self.sender, text=text)
                 res = self.client.message.send(msg)
                 print("[SOLAPI RES]", res)
                 return True
@@ -253,31 +472,74 @@ class SmsProvider:
             # SDK가 없을 때 간단 REST 시도(네트워크/인증 실패 가능)
             try:
                 url = "https://api.solapi.com/messages/v4/send"
-                payload = {"message": {"to": re.sub(r"\D", "", phone), "from": self.sender, "text": text}}
+                payload = {"message": {"to": _RE_NONDIGIT.sub("", phone), "from": self.sender, "text": text}}
                 # 실제 HMAC 인증은 SDK 권장. 여기서는 최소 예시(테스트 목적).
                 headers = {"Content-Type": "application/json; charset=utf-8"}
-                r = requests.post(url, json=payload, headers=headers, timeout=10)
+                r = self._session.post(url, json=payload, headers=headers, timeout=10)
                 print("[SOLAPI RAW RES]", r.status_code, r.text[:200])
                 return 200 <= r.status_code < 300
             except Exception as e:
                 print("[SOLAPI RAW ERROR]", e)
                 return False
 
+    def send_many(self, phones: List[str], text: str) -> Optional[tuple]:
+        """
+        같은 문안을 여러 수신자에게 한 번의 호출로 발송.
+        반환 (성공수, 실패수). 일괄 경로를 못 쓰면 None → 호출측이 개별 발송 폴백.
+        """
+        if not phones:
+            return (0, 0)
+        if not self.is_configured():
+            for phone in phones:
+                print(f"[DEV-SMS] to={phone} text={text}  (솔라피 키/시크릿/발신번호 미설정)")
+            return (len(phones), 0)
+
+        messages = [{"to": _RE_NONDIGIT.sub("", p), "from": self.sender, "text": text} for p in phones]
+
+        if HAS_SOLAPI_SDK and self.client:
+            # SDK가 일괄 발송을 지원할 때만 사용. 아니면 개별 발송 폴백.
+            send_many = getattr(self.client.message, "send_many", None)
+            if send_many is None:
+                return None
+            try:
+                msgs = [Message(to=m["to"], _from=self.sender, text=text) for m in messages]
+                res = send_many(msgs)
+                print("[SOLAPI BULK RES]", res)
+                return (len(phones), 0)
+            except Exception as e:
+                print("[SOLAPI BULK ERROR]", e)
+                return None
+
+        # SDK가 없을 때 간단 REST 시도(네트워크/인증 실패 가능)
+        try:
+            url = "https://api.solapi.com/messages/v4/send-many"
+            headers = {"Content-Type": "application/json; charset=utf-8"}
+            r = self._session.post(url, json={"messages": messages}, headers=headers, timeout=10)
+            print("[SOLAPI BULK RAW RES]", r.status_code, r.text[:200])
+            if 200 <= r.status_code < 300:
+                return (len(phones), 0)
+            return (0, len(phones))
+        except Exception as e:
+            print("[SOLAPI BULK RAW ERROR]", e)
+            return (0, len(phones))
+
 
 # =========================
 # 로그 감시
 # =========================
-class TailHandler(FileSystemEventHandler):
-    def __init__(self, app_state: "AppState"):
-        super().__init__()
-        self.app = app_state
+if HAS_WATCHDOG:
+    class _WakeHandler(FileSystemEventHandler):
+        # 이벤트 내용 검사 없이 tail 스레드만 깨움. 판정은 tail 루프의 stat이 담당.
+        def __init__(self, wake: threading.Event):
+            super().__init__()
+            self._wake = wake
+
+        def on_modified(self, event):
+            if not event.is_directory:
+                self._wake.set()
+
+        on_created = on_modified
 
-    def on_modified(self, event):
-        try:
-            if not event.is_directory and os.path.abspath(event.src_path) == os.path.abspath(self.app.current_file):
-                self.app.tail_new_lines()
-        except Exception as e:
-            self.app.append_status(f"[WatcherError] {e}")
 
 class AppState:
     def __init__(self):
@@ -285,13 +547,24 @@ class AppState:
         self.sms = SmsProvider()
         self.scheduler = BackgroundScheduler(timezone=TZ)
         self.current_file: str = current_log_path()
-        self.observer: Optional[Observer] = None
-
-        self._status: deque[str] = deque(maxlen=80)
-        self._dedup: deque[str] = deque(maxlen=200)
-        self._dedup_set: Set[str] = set()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._tail_thread: Optional[threading.Thread] = None
+        self._wake_observer = None
+
+        # 상태 메시지는 감시 스레드에서 (ts, msg)로만 push하고 포맷은 UI 드레인 시점에
+        self._status_q: "queue.SimpleQueue[tuple[float, str]]" = queue.SimpleQueue()
+        self._status_cache: deque[str] = deque(maxlen=80)
+        self._status_version = 0  # 드레인된 메시지 수. 상태창 렌더 캐시 키.
+        # FIFO 중복차단 창: 해시→None, 꽉 차면 가장 오래된 것부터 제거
+        self._dedup: "OrderedDict[int, None]" = OrderedDict()
+        self._dedup_max = 200
         self._tail_pos = 0
+        self._tail_fh = None  # 활성 로그 파일의 열린 핸들(바이너리)
+        self._tail_buf = b""  # 개행 전의 꼬리 부분 보관
         self._mutex = threading.Lock()
+        # 발송 병렬화: 구독자 수만큼 순차 HTTPS 왕복하지 않도록 풀로 묶음
+        self._send_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="sms")
 
         # 스케줄
         self.scheduler.add_job(self.reset_at_9, CronTrigger(hour=9, minute=0, timezone=TZ), name="daily_reset_09")
@@ -302,10 +575,20 @@ class AppState:
 
     # --- 보조
     def append_status(self, msg: str):
-        self._status.appendleft(f"{now_tz().strftime('%H:%M:%S')} {msg}")
+        # 핫패스에서는 큐에 넣기만. 문자열 포맷은 UI 쪽에서 지연 처리.
+        self._status_q.put((time.time(), msg))
 
     def get_status_list(self) -> List[str]:
-        return list(self._status)
+        # Streamlit UI 스레드에서만 호출됨 → 드레인 순서 보장
+        while True:
+            try:
+                ts, msg = self._status_q.get_nowait()
+            except queue.Empty:
+                break
+            hms = datetime.fromtimestamp(ts, TZ).strftime("%H:%M:%S")
+            self._status_cache.appendleft(f"{hms} {msg}")
+            self._status_version += 1
+        return list(self._status_cache)
 
     def reset_at_9(self):
         self.append_status("[Reset] Daily reset at 09:00")
@@ -326,65 +609,117 @@ class AppState:
     def start_watch(self):
         try:
             self._prepare_tail()
-            handler = TailHandler(self)
-            self.observer = Observer()
-            self.observer.schedule(handler, path=LOG_DIR, recursive=False)
-            self.observer.start()
+            if HAS_WATCHDOG and self._wake_observer is None:
+                try:
+                    self._wake_observer = Observer()
+                    self._wake_observer.schedule(_WakeHandler(self._wake), path=LOG_DIR, recursive=False)
+                    self._wake_observer.start()
+                except Exception:
+                    self._wake_observer = None  # 폴링만으로 계속
+            if self._tail_thread is None:
+                self._tail_thread = threading.Thread(target=self._tail_loop, name="tail", daemon=True)
+                self._tail_thread.start()
             self.append_status(f"[Watch] {os.path.basename(self.current_file)}")
         except Exception as e:
             self.append_status(f"[WatchError] {e}")
 
     def restart_watch(self):
-        try:
-            if self.observer:
-                self.observer.stop()
-                self.observer.join(timeout=2)
-        except Exception:
-            pass
+        self._close_tail()
         self.start_watch()
 
+    def _tail_loop(self):
+        # 전용 tail 스레드. watchdog이 있으면 이벤트로 즉시 깨어나고
+        # (유휴 시 syscall 없음), 없으면 200ms 폴링으로 동작.
+        idle_wait = 2.0 if self._wake_observer else 0.2
+        while not self._stop.is_set():
+            try:
+                st_ = os.stat(self.current_file)
+                if st_.st_size > self._tail_pos:
+                    self.tail_new_lines()
+                elif st_.st_size < self._tail_pos:
+                    # 파일이 줄어듦 = truncate/교체. 처음부터 다시 tail.
+                    self._reopen_tail_from_start()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                self.append_status(f"[WatcherError] {e}")
+            self._wake.wait(idle_wait)
+            self._wake.clear()
+
+    def _close_tail(self):
+        if self._tail_fh:
+            try:
+                self._tail_fh.close()
+            except Exception:
+                pass
+            self._tail_fh = None
+        self._tail_buf = b""
+
     def _prepare_tail(self):
         path = self.current_file
+        # 렌더마다 basename을 다시 계산하지 않도록 여기서 한 번만
+        self.current_file_name = os.path.basename(path)
         if not os.path.exists(path):
             try:
                 open(path, "a", encoding="utf-8").close()
             except Exception:
                 pass
+        self._close_tail()
         try:
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                f.seek(0, os.SEEK_END)
-                self._tail_pos = f.tell()
+            # 파일을 한 번만 열어두고 이후에는 델타만 read()
+            self._tail_fh = open(path, "rb")
+            self._tail_fh.seek(0, os.SEEK_END)
+            self._tail_pos = self._tail_fh.tell()
         except Exception:
+            self._tail_fh = None
             self._tail_pos = 0
 
+    def _reopen_tail_from_start(self):
+        with self._mutex:
+            self._close_tail()
+            try:
+                self._tail_fh = open(self.current_file, "rb")
+                self._tail_pos = 0
+            except Exception:
+                self._tail_fh = None
+                self._tail_pos = 0
+        self.append_status(f"[Tail] truncate 감지 → {os.path.basename(self.current_file)} 처음부터 재감시")
+
     def tail_new_lines(self):
-        path = self.current_file
         with self._mutex:
+            if self._tail_fh is None:
+                return
             try:
-                with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                    f.seek(self._tail_pos)
-                    lines = f.readlines()
-                    self._tail_pos = f.tell()
-                for raw in lines:
-                    line = raw.rstrip("\n")
-                    if line.strip():
-                        self._handle_line(line)
+                # 스퓨리어스 호출 방지: fstat 한 번으로 자란 경우에만 읽기
+                if os.fstat(self._tail_fh.fileno()).st_size <= self._tail_pos:
+                    return
+                data = self._tail_fh.read()
+                if not data:
+                    return
+                self._tail_pos = self._tail_fh.tell()
+                data = self._tail_buf + data
+                *complete, self._tail_buf = data.split(b"\n")
+                for raw in complete:
+                    raw = raw.strip()
+                    if raw:
+                        self._handle_line(raw)
             except Exception as e:
                 self.append_status(f"[TailError] {e}")
 
-    def _handle_line(self, line: str):
+    def _handle_line(self, line: bytes):
         # 중복차단
         h = line_hash(line)
-        if h in self._dedup_set:
+        if h in self._dedup:
             return
-        self._dedup.append(h)
-        self._dedup_set.add(h)
-        if len(self._dedup) == self._dedup.maxlen:
-            oldest = self._dedup[0]
-            self._dedup_set.discard(oldest)
-
-        vehicle = last_bracket_value(line)
-        if not vehicle or vehicle not in VEHICLE_SET:
+        self._dedup[h] = None
+        if len(self._dedup) > self._dedup_max:
+            self._dedup.popitem(last=False)
+
+        cand = last_bracket_value(line)
+        if not cand:
+            return
+        vehicle = _RESOLVE.get(cand)
+        if vehicle is None:
             return
 
         targets = self.storage.subscribers_for_vehicle(vehicle)
@@ -393,11 +728,14 @@ class AppState:
             return
 
         text = f"[출동알림] {vehicle}"  # 차량명만
-        ok, fail = 0, 0
-        for phone in targets:
-            sent = self.sms.send(phone, text)
-            ok += 1 if sent else 0
-            fail += 0 if sent else 1
+        # 우선 일괄 발송(HTTP 1회). 불가하면 풀로 개별 발송 폴백.
+        res = self.sms.send_many(targets, text)
+        if res is not None:
+            ok, fail = res
+        else:
+            results = list(self._send_pool.map(lambda p: self.sms.send(p, text), targets))
+            ok = sum(1 for r in results if r)
+            fail = len(results) - ok
         self.append_status(f"[Send] {vehicle} → 성공 {ok} / 실패 {fail}")
 
 
@@ -419,7 +757,7 @@ if not st.session_state.is_authed:
         if not APP_PASSWORD:
             st.warning("⚠️ .env의 APP_PASSWORD가 설정되지 않아 개발모드로 통과합니다.")
             st.session_state.is_authed = True
-        elif pw == APP_PASSWORD:
+        elif hmac.compare_digest((pw or "").encode("utf-8"), APP_PASSWORD.encode("utf-8")):  # 상수시간 비교
             st.session_state.is_authed = True
         else:
             st.error("비밀번호가 올바르지 않습니다.")
@@ -434,58 +772,57 @@ app = get_app_state()
 # 환경확인
 with st.expander("환경 설정 확인", expanded=False):
     st.write(f"LOG_DIR: `{LOG_DIR}`")
-    st.write(f"오늘 로그 파일: `{os.path.basename(app.current_file)}`")
+    st.write(f"오늘 로그 파일: `{app.current_file_name}`")
     st.write(f"APP_TZ: `{APP_TZ}` / 현재시각: `{now_iso()}`")
     solapi_ok = "✅" if app.sms.is_configured() else "❌"
     st.write(f"Solapi 설정: {solapi_ok}  (SDK 설치: {'✅' if HAS_SOLAPI_SDK else '❌'})")
 
-# 구독 관리
+# 구독 관리 — form으로 묶어 키 입력마다 전체 rerun이 돌지 않게 함
 st.subheader("📱 구독 관리")
-col1, col2 = st.columns(2)
-with col1:
-    phone = st.text_input("전화번호(숫자만, 10~11자리)", placeholder="01012345678", key="sub_phone")
-with col2:
-    vehicle = st.selectbox("차량 선택", VEHICLES, index=0, key="sub_vehicle")
-
-c1, c2, c3 = st.columns(3)
-with c1:
-    if st.button("✅ 신청"):
-        if not valid_phone(phone):
-            st.error("전화번호 형식 오류 (10~11자리 숫자)")
-        else:
-            app.storage.upsert(phone, [vehicle], cancel_hold=False)
-            st.success(f"{mask_phone(phone)} / {vehicle} 신청 완료")
-
-with c2:
-    if st.button("🗑 해지"):
-        if not valid_phone(phone):
-            st.error("전화번호 형식 오류")
-        else:
-            app.storage.remove(phone)
-            st.success(f"{mask_phone(phone)} 해지 완료")
-
-with c3:
-    if st.button("⏸ 09시 이전 취소 희망 토글"):
-        if not valid_phone(phone):
-            st.error("전화번호 형식 오류")
-        else:
-            current = False
-            for rec in app.storage.list():
-                if rec["phone"] == phone:
-                    current = rec.get("cancel_hold_until_09", False)
-                    break
-            app.storage.set_cancel_hold(phone, not current)
-            st.success(f"{mask_phone(phone)} / 취소희망 = {not current}")
+with st.form(key="sub_form"):
+    col1, col2 = st.columns(2)
+    with col1:
+        phone = st.text_input("전화번호(숫자만, 10~11자리)", placeholder="01012345678", key="sub_phone")
+    with col2:
+        vehicle = st.selectbox("차량 선택", VEHICLES, index=0, key="sub_vehicle")
+    action = st.radio("동작", ["✅ 신청", "🗑 해지", "⏸ 09시 이전 취소 희망 토글"], horizontal=True, key="sub_action")
+    submitted = st.form_submit_button("실행", use_container_width=True)
+
+if submitted:
+    if not valid_phone(phone):
+        st.error("전화번호 형식 오류 (10~11자리 숫자)")
+    elif action == "✅ 신청":
+        app.storage.upsert(phone, [vehicle], cancel_hold=False)
+        st.success(f"{mask_phone(phone)} / {vehicle} 신청 완료")
+    elif action == "🗑 해지":
+        app.storage.remove(phone)
+        st.success(f"{mask_phone(phone)} 해지 완료")
+    else:
+        rec = app.storage.get(phone)
+        current = rec.get("cancel_hold_until_09", False) if rec else False
+        app.storage.set_cancel_hold(phone, not current)
+        st.success(f"{mask_phone(phone)} / 취소희망 = {not current}")
 
 st.markdown("---")
 st.subheader("📋 현재 구독 현황 (당일)")
-rows = [{
-    "전화번호": mask_phone(rec["phone"]),
-    "차량": ", ".join(rec.get("vehicles", [])),
-    "취소희망(09시전)": "예" if rec.get("cancel_hold_until_09", False) else "아니오",
-    "신청시각": rec.get("created_at", "")[:19],
-} for rec in app.storage.list()]
-st.dataframe(rows, use_container_width=True, hide_index=True)
+
+_SUB_COLS = ["전화번호", "차량", "취소희망(09시전)", "신청시각"]
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _subscriber_df(version: int) -> pd.DataFrame:
+    # version이 같으면 캐시 히트 → 재실행마다 전체 목록을 다시 만들지 않음
+    rows = [(
+        mask_phone(rec.phone),
+        ", ".join(rec.vehicles),
+        "예" if rec.cancel_hold_until_09 else "아니오",
+        rec.created_at_short,
+    ) for rec in app.storage.list()]
+    df = pd.DataFrame.from_records(rows, columns=_SUB_COLS)
+    # 예/아니오 열은 category로 — Arrow 페이로드가 int8 코드로 줄어든다
+    df[_SUB_COLS[2]] = df[_SUB_COLS[2]].astype("category")
+    return df
+
+st.dataframe(_subscriber_df(app.storage.version()), use_container_width=True, hide_index=True)
 
 # 진단 도구
 with st.expander("🔧 진단 도구", expanded=False):
@@ -520,15 +857,13 @@ with st.expander("🧪 강제 리셋 테스트", expanded=False):
 
 st.markdown("---")
 st.subheader("🧭 로그 감시 상태")
-status_lines = app.get_status_list()
-st.code("\n".join(status_lines) if status_lines else "대기 중...", language="text")
 
-st.caption("""
-실행:
-1) .env 설정(LOG_DIR, LOG_FILE_PREFIX, APP_TZ, SOLAPI_*)
-2) pip install streamlit watchdog apscheduler python-dotenv requests tzdata [solapi]
-3) streamlit run app.py
-- 파일명: {LOG_DIR}/{LOG_FILE_PREFIX}{YYYY.MM.DD}.txt
-- 매일 09:00(타임존 기준) 리셋, 자정 파일 롤오버
-- Solapi 미설정/미설치면 개발모드로 콘솔로그만 출력됩니다.
-""")
+@st.cache_data(show_spinner=False, max_entries=1)
+def _render_status(version: int) -> str:
+    lines = app.get_status_list()
+    return "\n".join(lines) if lines else "대기 중..."
+
+app.get_status_list()  # 새 메시지 드레인 + 버전 갱신
+st.code(_render_status(app._status_version), language="text")
+
+st.caption(FOOTER_TEXT)